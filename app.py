@@ -1,15 +1,19 @@
 """딸깍 무비 - Streamlit 웹 UI"""
 
 import streamlit as st
+from dotenv import load_dotenv
+from functools import lru_cache
 from pathlib import Path
 import os
 import sys
 
+API_KEY_NAMES = ['ANTHROPIC_API_KEY', 'GEMINI_API_KEY', 'OPENAI_API_KEY']
+
 # Streamlit Cloud 환경 설정
 if 'STREAMLIT_SHARING' in os.environ or '/mount/src' in os.getcwd():
     # Streamlit secrets에서 환경변수 로드
     if hasattr(st, 'secrets'):
-        for key in ['ANTHROPIC_API_KEY', 'GEMINI_API_KEY', 'OPENAI_API_KEY']:
+        for key in API_KEY_NAMES:
             if key in st.secrets:
                 os.environ[key] = st.secrets[key]
 
@@ -18,25 +22,51 @@ PROJECT_ROOT = Path(__file__).parent
 OUTPUT_DIR = PROJECT_ROOT / "output"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# .env 파일 로드 (이미 설정된 환경 변수는 유지)
+ENV_PATH = PROJECT_ROOT / ".env"
+load_dotenv(ENV_PATH)
+
+
+@st.cache_resource
+def get_pipeline(
+    image_provider: str,
+    target_duration: int,
+    test_mode: bool,
+    enable_subtitles: bool,
+    enable_transitions: bool,
+    resolution: str,
+):
+    """설정 조합별로 파이프라인을 한 번만 만들어 재사용 (API 클라이언트 연결 유지)"""
+    # 지연 import (Streamlit Cloud 호환성)
+    from src.pipeline import DDalkkakPipeline
+
+    return DDalkkakPipeline(
+        image_provider=image_provider,
+        target_duration=target_duration,
+        test_mode=test_mode,
+        enable_subtitles=enable_subtitles,
+        enable_transitions=enable_transitions,
+        resolution=resolution,
+    )
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def generate_script(_script_gen, prompt: str, target_duration: int, test_mode: bool):
+    """같은 프롬프트/길이의 대본은 1시간 동안 재사용 (Claude 호출 비용 절감)
+
+    _script_gen은 캐시 키에서 제외되고, test_mode로 더미 대본과 구분한다.
+    """
+    return _script_gen.generate(prompt, target_duration)
+
 
 def load_env_keys():
-    """현재 .env 파일에서 API 키 로드"""
-    env_path = Path(__file__).parent / ".env"
-    keys = {}
-    if env_path.exists():
-        with open(env_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    keys[key] = value
-    return keys
+    """현재 프로세스 환경 변수에서 API 키 로드 (.env는 시작/저장 시 반영됨)"""
+    return {key: os.environ.get(key, "") for key in API_KEY_NAMES}
 
 
 def save_env_keys(keys: dict):
     """API 키를 .env 파일에 저장"""
-    env_path = Path(__file__).parent / ".env"
-    with open(env_path, "w", encoding="utf-8") as f:
+    with open(ENV_PATH, "w", encoding="utf-8") as f:
         f.write("# DDalkkak Movie - API Keys\n\n")
         f.write("# Anthropic (Claude) API - 대본 생성\n")
         f.write(f"ANTHROPIC_API_KEY={keys.get('ANTHROPIC_API_KEY', '')}\n\n")
@@ -49,12 +79,44 @@ def save_env_keys(keys: dict):
         else:
             f.write("# OPENAI_API_KEY=your_openai_api_key_here\n")
 
-    # 환경 변수도 업데이트
-    for key, value in keys.items():
+    # 환경 변수도 업데이트 (빈 키는 주석으로 저장되어 load_dotenv가 지우지 못하므로 직접 반영)
+    for name in API_KEY_NAMES:
+        value = keys.get(name, "")
         if value:
-            os.environ[key] = value
+            os.environ[name] = value
+        else:
+            os.environ.pop(name, None)
+
+    # 이전 키로 만들어진 파이프라인 폐기
+    get_pipeline.clear()
 
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_video_bytes(path: str, mtime: float, size: int) -> bytes:
+    """영상 파일 읽기 (경로/수정시각/크기가 같으면 디스크를 다시 읽지 않음)"""
+    return Path(path).read_bytes()
+
+
+def read_video(path: Path) -> bytes:
+    """파일 상태를 캐시 키로 사용하여 영상 데이터 반환"""
+    stat = path.stat()
+    return load_video_bytes(str(path), stat.st_mtime, stat.st_size)
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def list_recent_videos(limit: int = 5) -> list:
+    """최근 영상 (경로, 수정시각, 크기) 목록 - scandir의 캐시된 stat 사용"""
+    entries = []
+    with os.scandir(OUTPUT_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".mp4") and entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+    entries.sort(key=lambda t: t[1], reverse=True)
+    return entries[:limit]
+
+
+@lru_cache(maxsize=32)
 def mask_key(key: str) -> str:
     """API 키를 마스킹하여 표시"""
     if not key or len(key) < 10:
@@ -73,17 +135,20 @@ def main():
     st.subheader("프롬프트 한 줄로 영상 자동화")
 
     # 마지막 생성 영상 다운로드 (세션에 저장된 경우)
-    if 'last_video' in st.session_state:
+    # (세션에는 경로만 두고, 영상 데이터는 rerun마다 load_video_bytes 캐시에서 가져옴
+    #  - 파일이 바뀌지 않았으면 디스크를 다시 읽지 않음)
+    last_video = st.session_state.get('last_video')
+    if last_video and Path(last_video['path']).exists():
         with st.expander("📥 최근 생성 영상 다운로드", expanded=True):
-            last_video = st.session_state['last_video']
+            video_data = read_video(Path(last_video['path']))
             st.write(f"**{last_video['title']}**")
             col_a, col_b = st.columns([3, 1])
             with col_a:
-                st.video(last_video['data'])
+                st.video(video_data)
             with col_b:
                 st.download_button(
                     label="📥 다운로드",
-                    data=last_video['data'],
+                    data=video_data,
                     file_name=last_video['name'],
                     mime="video/mp4",
                     use_container_width=True,
@@ -221,16 +286,20 @@ def main():
             st.error("API 키를 먼저 설정해주세요.")
             return
 
-        # 진행 상태 표시
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        # 진행 상태 표시 (하나의 status 블록 안에서 라벨/진행률만 갱신)
+        status = st.status("📝 [1/3] 대본 생성 중...", expanded=True)
+        progress_bar = status.progress(0)
+        last_progress = [0]
 
-        try:
-            # 지연 import (Streamlit Cloud 호환성)
-            from src.pipeline import DDalkkakPipeline
+        def report_progress(value: int):
+            # 값이 바뀔 때만 브라우저로 전송
+            if value != last_progress[0]:
+                last_progress[0] = value
+                progress_bar.progress(value)
 
-            # 파이프라인 생성
-            pipeline = DDalkkakPipeline(
+        try:
+            # 파이프라인 (설정이 같으면 캐시된 인스턴스 재사용)
+            pipeline = get_pipeline(
                 image_provider=image_provider,
                 target_duration=duration,
                 test_mode=test_mode,
@@ -240,41 +309,29 @@ def main():
             )
 
             # 1단계: 대본 생성
-            status_text.text("📝 [1/4] 대본 생성 중...")
-            progress_bar.progress(10)
+            report_progress(10)
 
-            project_script = pipeline.script_gen.generate(prompt, duration)
-            progress_bar.progress(25)
+            project_script = generate_script(pipeline.script_gen, prompt, duration, test_mode)
+            report_progress(25)
 
-            st.info(f"📄 제목: {project_script.title}")
-            st.info(f"📊 장면 수: {project_script.total_scenes}개")
+            status.write(f"📄 제목: {project_script.title}")
+            status.write(f"📊 장면 수: {project_script.total_scenes}개")
 
-            # 2단계: 이미지 생성
-            status_text.text("🖼️ [2/4] 이미지 생성 중...")
-            for i, scene in enumerate(project_script.scenes):
-                scene.image_path = pipeline.image_gen.generate(
-                    scene.image_prompt, scene.scene_number
-                )
-                progress = 25 + int((i + 1) / len(project_script.scenes) * 25)
-                progress_bar.progress(progress)
-
-            # 3단계: TTS 생성
-            status_text.text("🎙️ [3/4] 음성 생성 중...")
-            for i, scene in enumerate(project_script.scenes):
-                scene.audio_path, scene.duration = pipeline.tts_gen.generate(
-                    scene.narration, scene.scene_number
-                )
-                progress = 50 + int((i + 1) / len(project_script.scenes) * 25)
-                progress_bar.progress(progress)
+            # 2단계: 이미지 + 음성 생성 (동시 진행)
+            status.update(label="🖼️ [2/3] 이미지 및 음성 생성 중...")
+            pipeline.generate_media(
+                project_script,
+                on_progress=lambda done, total: report_progress(25 + int(done / total * 50)),
+            )
 
-            # 4단계: 영상 합성
-            status_text.text("🎬 [4/4] 영상 합성 중...")
-            progress_bar.progress(80)
+            # 3단계: 영상 합성
+            status.update(label="🎬 [3/3] 영상 합성 중...")
+            report_progress(80)
 
             output_path = pipeline.video_composer.compose(project_script)
-            progress_bar.progress(100)
+            report_progress(100)
 
-            status_text.text("✅ 완성!")
+            status.update(label="✅ 완성!", state="complete", expanded=False)
 
             # 결과 표시
             st.success(f"🎉 영상 생성 완료!")
@@ -283,16 +340,18 @@ def main():
 
             # 영상 미리보기 및 다운로드
             if output_path.exists():
-                # 영상 데이터를 세션에 저장 (다운로드용)
-                with open(output_path, "rb") as f:
-                    video_data = f.read()
+                # 새 영상이 목록에 바로 보이도록 캐시 무효화
+                list_recent_videos.clear()
 
+                # 영상 경로를 세션에 저장 (다운로드용)
                 st.session_state['last_video'] = {
-                    'data': video_data,
+                    'path': str(output_path),
                     'name': output_path.name,
                     'title': project_script.title
                 }
 
+                video_data = read_video(output_path)
+
                 # 영상 미리보기
                 st.video(video_data)
 
@@ -310,6 +369,7 @@ def main():
                     )
 
         except Exception as e:
+            status.update(label="❌ 생성 실패", state="error")
             st.error(f"오류 발생: {e}")
             raise
 
@@ -317,23 +377,21 @@ def main():
     st.divider()
     st.subheader("📁 생성된 영상 목록")
 
-    video_files = list(OUTPUT_DIR.glob("*.mp4"))
+    video_files = list_recent_videos()
     if video_files:
-        video_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-
-        for video_file in video_files[:5]:  # 최근 5개만 표시
+        for path, mtime, size in video_files:
+            name = os.path.basename(path)
             col1, col2 = st.columns([3, 1])
             with col1:
-                st.text(f"🎬 {video_file.name}")
+                st.text(f"🎬 {name}")
             with col2:
-                with open(video_file, "rb") as f:
-                    st.download_button(
-                        label="📥",
-                        data=f,
-                        file_name=video_file.name,
-                        mime="video/mp4",
-                        key=str(video_file)
-                    )
+                st.download_button(
+                    label="📥",
+                    data=load_video_bytes(path, mtime, size),
+                    file_name=name,
+                    mime="video/mp4",
+                    key=path
+                )
     else:
         st.text("아직 생성된 영상이 없습니다.")
 
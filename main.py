@@ -11,6 +11,8 @@ import argparse
 import sys
 import os
 
+from dotenv import dotenv_values
+
 from src.pipeline import DDalkkakPipeline
 
 
@@ -27,14 +29,9 @@ def setup_api_keys():
     env_path = os.path.join(os.path.dirname(__file__), ".env")
 
     # 기존 .env 파일 읽기
-    existing_keys = {}
-    if os.path.exists(env_path):
-        with open(env_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    existing_keys[key] = value
+    existing_keys = {
+        key: value or "" for key, value in dotenv_values(env_path).items()
+    }
 
     # Anthropic API 키
     current_anthropic = existing_keys.get("ANTHROPIC_API_KEY", "")
@@ -140,6 +137,11 @@ def main():
         default="1080p",
         help="영상 해상도 (기본: 1080p)"
     )
+    parser.add_argument(
+        "--hwaccel",
+        default="auto",
+        help="영상 인코더 (auto: 하드웨어 인코더 자동 선택, none: libx264, 또는 h264_nvenc 등)",
+    )
 
     args = parser.parse_args()
 
@@ -181,6 +183,7 @@ def main():
             enable_subtitles=not args.no_subtitles,
             enable_transitions=not args.no_transitions,
             resolution=args.resolution,
+            hwaccel=args.hwaccel,
         )
         pipeline.create(prompt, args.output)
 
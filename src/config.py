@@ -36,3 +36,6 @@ RESOLUTION_PRESETS = {
 # TTS 설정
 TTS_LANGUAGE = "ko"  # 한국어
 TTS_SLOW = False
+
+# 병렬 처리 설정 (장면별 API 호출 동시 실행 수)
+MAX_WORKERS = 8
@@ -1,22 +1,46 @@
 """이미지 생성기 - 다양한 이미지 생성 API 지원"""
 
-import urllib.request
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional
 
-from ..config import OPENAI_API_KEY, TEMP_DIR
+from ..config import TEMP_DIR
 import os
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+@lru_cache(maxsize=None)
+def _get_openai_client(api_key: Optional[str]):
+    """API 키별 OpenAI 클라이언트 (HTTP 커넥션 풀 공유)"""
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
+
+@lru_cache(maxsize=None)
+def _get_http_client():
+    """이미지 다운로드용 공유 HTTP 클라이언트 (장면마다 TLS 연결을 새로 맺지 않음)"""
+    import httpx
+
+    return httpx.Client(timeout=30.0, follow_redirects=True)
+
+
+@lru_cache(maxsize=None)
+def _get_gemini_client(api_key: Optional[str]):
+    """API 키별 Gemini 클라이언트 (HTTP 커넥션 풀 공유)"""
+    from google import genai
+
+    return genai.Client(api_key=api_key)
 
 
 class ImageGeneratorBase(ABC):
     """이미지 생성기 추상 클래스"""
 
     @abstractmethod
-    def generate(self, prompt: str, output_path: Path) -> Path:
-        """프롬프트로 이미지 생성"""
+    def generate(self, prompt: str, output_path: Path, sink: Optional[BinaryIO] = None) -> Path:
+        """프롬프트로 이미지 생성 (sink가 주어지면 파일 대신 sink에 기록)"""
         pass
 
 
@@ -24,14 +48,13 @@ class OpenAIImageGenerator(ImageGeneratorBase):
     """OpenAI DALL-E 이미지 생성기"""
 
     def __init__(self, api_key: Optional[str] = None):
-        from openai import OpenAI
-
-        self.client = OpenAI(api_key=api_key or OPENAI_API_KEY)
+        self.client = _get_openai_client(api_key or os.getenv("OPENAI_API_KEY"))
 
     def generate(
         self,
         prompt: str,
         output_path: Path,
+        sink: Optional[BinaryIO] = None,
         size: str = "1792x1024",
         quality: str = "standard",
     ) -> Path:
@@ -41,6 +64,7 @@ class OpenAIImageGenerator(ImageGeneratorBase):
         Args:
             prompt: 이미지 생성 프롬프트
             output_path: 저장할 경로
+            sink: 파일 대신 기록할 버퍼 (선택)
             size: 이미지 크기 (1024x1024, 1792x1024, 1024x1792)
             quality: 품질 (standard, hd)
         """
@@ -54,8 +78,16 @@ class OpenAIImageGenerator(ImageGeneratorBase):
 
         image_url = response.data[0].url
 
-        # 이미지 다운로드
-        urllib.request.urlretrieve(image_url, str(output_path))
+        # 이미지 다운로드 (연결 풀 재사용, 청크 단위로 저장)
+        with _get_http_client().stream("GET", image_url) as r:
+            r.raise_for_status()
+            if sink is not None:
+                for chunk in r.iter_bytes(65536):
+                    sink.write(chunk)
+            else:
+                with open(output_path, "wb") as f:
+                    for chunk in r.iter_bytes(65536):
+                        f.write(chunk)
 
         return output_path
 
@@ -64,17 +96,16 @@ class GeminiImageGenerator(ImageGeneratorBase):
     """Google Gemini 이미지 생성기"""
 
     def __init__(self, api_key: Optional[str] = None):
-        from google import genai
+        self.client = _get_gemini_client(api_key or os.getenv("GEMINI_API_KEY"))
 
-        self.client = genai.Client(api_key=api_key or GEMINI_API_KEY)
-
-    def generate(self, prompt: str, output_path: Path) -> Path:
+    def generate(self, prompt: str, output_path: Path, sink: Optional[BinaryIO] = None) -> Path:
         """
         Gemini로 이미지 생성
 
         Args:
             prompt: 이미지 생성 프롬프트
             output_path: 저장할 경로
+            sink: 파일 대신 기록할 버퍼 (선택)
         """
         from google.genai import types
 
@@ -93,8 +124,10 @@ class GeminiImageGenerator(ImageGeneratorBase):
                 if part.inline_data and part.inline_data.mime_type.startswith("image/"):
                     # 이미지 데이터 저장
                     image_data = part.inline_data.data
-                    with open(output_path, "wb") as f:
-                        f.write(image_data)
+                    if sink is not None:
+                        sink.write(image_data)
+                    else:
+                        output_path.write_bytes(image_data)
                     return output_path
 
         raise Exception("이미지 생성 실패 - 응답에 이미지가 없습니다")
@@ -115,23 +148,41 @@ class PlaceholderImageGenerator(ImageGeneratorBase):
         (90, 90, 140),    # 연보라
     ]
 
-    def generate(self, prompt: str, output_path: Path) -> Path:
+    # 색상별 그라데이션 테두리 색 (미리 계산한 8x5 테이블)
+    OUTLINE_COLORS = [
+        [tuple(min(255, c + 20 + i * 10) for c in color) for i in range(5)]
+        for color in COLORS
+    ]
+
+    def generate(self, prompt: str, output_path: Path, sink: Optional[BinaryIO] = None) -> Path:
         """간단한 플레이스홀더 이미지 생성"""
+        if sink is not None:
+            sink.write(self._render(prompt))
+        else:
+            output_path.write_bytes(self._render(prompt))
+        return output_path
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _render(prompt: str) -> bytes:
+        """프롬프트별 PNG 데이터 (결과가 프롬프트로 결정되므로 캐시)"""
         from PIL import Image, ImageDraw
         import hashlib
+        import io
 
         # 프롬프트 기반으로 색상 선택
-        color_idx = int(hashlib.md5(prompt.encode()).hexdigest(), 16) % len(self.COLORS)
-        bg_color = self.COLORS[color_idx]
+        colors = PlaceholderImageGenerator.COLORS
+        color_idx = hashlib.md5(prompt.encode()).digest()[-1] % len(colors)
+        bg_color = colors[color_idx]
+        outline_colors = PlaceholderImageGenerator.OUTLINE_COLORS[color_idx]
 
         # 1920x1080 RGB 이미지 생성
         img = Image.new("RGB", (1920, 1080), color=bg_color)
         draw = ImageDraw.Draw(img)
 
         # 그라데이션 효과 (간단한 사각형들)
-        for i in range(5):
+        for i, lighter in enumerate(outline_colors):
             offset = i * 50
-            lighter = tuple(min(255, c + 20 + i * 10) for c in bg_color)
             draw.rectangle([offset, offset, 1920 - offset, 1080 - offset], outline=lighter, width=2)
 
         # 프롬프트 텍스트 표시
@@ -144,8 +195,17 @@ class PlaceholderImageGenerator(ImageGeneratorBase):
         draw.text((100, 500), text, fill=(255, 255, 255))
         draw.text((100, 550), "[Placeholder Image]", fill=(180, 180, 180))
 
-        img.save(output_path, "PNG")
-        return output_path
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+        return buffer.getvalue()
+
+
+# 제공자 이름 -> 생성기 클래스
+PROVIDERS = {
+    "gemini": GeminiImageGenerator,
+    "openai": OpenAIImageGenerator,
+    "placeholder": PlaceholderImageGenerator,
+}
 
 
 class ImageGenerator:
@@ -156,40 +216,49 @@ class ImageGenerator:
         Args:
             provider: "openai", "gemini", "placeholder", 또는 "auto"
         """
+        self.provider = self._resolve(provider)
+        self.generator = PROVIDERS[self.provider]()
+
+    @staticmethod
+    def _resolve(provider: str) -> str:
+        """제공자 이름 결정 (auto는 현재 설정된 API 키 기준, 알 수 없는 값은 플레이스홀더)"""
         if provider == "auto":
             # API 키가 있으면 해당 서비스 사용, 없으면 플레이스홀더
-            if GEMINI_API_KEY:
-                self.generator = GeminiImageGenerator()
-                self.provider = "gemini"
-            elif OPENAI_API_KEY:
-                self.generator = OpenAIImageGenerator()
-                self.provider = "openai"
-            else:
-                self.generator = PlaceholderImageGenerator()
-                self.provider = "placeholder"
-        elif provider == "gemini":
-            self.generator = GeminiImageGenerator()
-            self.provider = "gemini"
-        elif provider == "openai":
-            self.generator = OpenAIImageGenerator()
-            self.provider = "openai"
-        else:
-            self.generator = PlaceholderImageGenerator()
-            self.provider = "placeholder"
-
-    def generate(self, prompt: str, scene_number: int) -> Path:
+            if os.getenv("GEMINI_API_KEY"):
+                return "gemini"
+            if os.getenv("OPENAI_API_KEY"):
+                return "openai"
+            return "placeholder"
+        return provider if provider in PROVIDERS else "placeholder"
+
+    def generate(self, prompt: str, scene_number: int, sink: Optional[BinaryIO] = None) -> Path:
         """
         이미지 생성
 
         Args:
             prompt: 이미지 프롬프트
             scene_number: 장면 번호 (파일명에 사용)
+            sink: 파일 대신 기록할 버퍼 (선택, 이때 반환 경로에는 파일이 생기지 않음)
 
         Returns:
             생성된 이미지 경로
         """
         output_path = TEMP_DIR / f"scene_{scene_number:03d}.png"
-        return self.generator.generate(prompt, output_path)
+        return self.generator.generate(prompt, output_path, sink=sink)
+
+    async def agenerate(
+        self, prompt: str, scene_number: int, executor: Optional[Executor] = None
+    ) -> Path:
+        """
+        generate의 비동기 버전 (블로킹 API 호출은 작업 스레드에서 실행)
+
+        Args:
+            prompt: 이미지 프롬프트
+            scene_number: 장면 번호 (파일명에 사용)
+            executor: 호출을 실행할 스레드 풀 (없으면 이벤트 루프 기본 풀)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.generate, prompt, scene_number)
 
 
 if __name__ == "__main__":
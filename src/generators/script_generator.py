@@ -1,12 +1,43 @@
 """대본 생성기 - Claude API를 사용하여 프롬프트에서 대본 생성"""
 
-import json
 from typing import Optional
 
 from ..config import ANTHROPIC_API_KEY
 from ..models import Script, Scene
 
 
+# Claude가 대본을 구조화된 입력으로 돌려주도록 강제하는 도구 정의
+SCRIPT_TOOL = {
+    "name": "emit_script",
+    "description": "완성된 영상 대본을 제출합니다.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string", "description": "영상 제목"},
+            "scenes": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "scene_number": {"type": "integer"},
+                        "narration": {
+                            "type": "string",
+                            "description": "이 장면에서 읽을 나레이션 텍스트",
+                        },
+                        "image_prompt": {
+                            "type": "string",
+                            "description": "이 장면을 표현할 이미지 생성 프롬프트 (영어로)",
+                        },
+                    },
+                    "required": ["scene_number", "narration", "image_prompt"],
+                },
+            },
+        },
+        "required": ["title", "scenes"],
+    },
+}
+
+
 class ScriptGenerator:
     """프롬프트를 받아 영상 대본을 생성하는 클래스"""
 
@@ -36,27 +67,19 @@ class ScriptGenerator:
         if self.use_placeholder:
             return self._generate_placeholder(prompt, num_scenes)
 
+        data = self._request_script(prompt, num_scenes, target_duration)
+        return self._build_script(data)
+
+    def _request_script(self, prompt: str, num_scenes: int, target_duration: int) -> dict:
+        """Claude API를 호출하여 대본 데이터(dict)를 받아옴"""
         system_prompt = """당신은 유튜브 설명 영상의 대본 작가입니다.
-사용자의 요청을 받아 영상 대본을 JSON 형식으로 작성합니다.
-
-출력 형식 (반드시 이 JSON 구조를 따르세요):
-{
-    "title": "영상 제목",
-    "scenes": [
-        {
-            "scene_number": 1,
-            "narration": "이 장면에서 읽을 나레이션 텍스트",
-            "image_prompt": "이 장면을 표현할 이미지 생성 프롬프트 (영어로)"
-        }
-    ]
-}
+사용자의 요청을 받아 영상 대본을 작성하고 emit_script 도구로 제출합니다.
 
 규칙:
 1. narration은 자연스러운 한국어로 작성
 2. image_prompt는 영어로, 구체적이고 시각적으로 표현
 3. 각 장면의 나레이션은 15-25초 분량 (약 50-80자)
-4. 전체적으로 기승전결 구조를 유지
-5. JSON만 출력, 다른 텍스트 없이"""
+4. 전체적으로 기승전결 구조를 유지"""
 
         user_message = f"""다음 주제로 {num_scenes}개 장면의 영상 대본을 작성해주세요:
 
@@ -68,21 +91,21 @@ class ScriptGenerator:
             model="claude-sonnet-4-20250514",
             max_tokens=4096,
             system=system_prompt,
+            tools=[SCRIPT_TOOL],
+            tool_choice={"type": "tool", "name": SCRIPT_TOOL["name"]},
             messages=[{"role": "user", "content": user_message}],
         )
 
-        # 응답 파싱
-        response_text = response.content[0].text
-
-        # JSON 추출 (코드 블록 안에 있을 수 있음)
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0]
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0]
+        # 도구 입력은 SDK가 이미 dict로 파싱해 둠 (텍스트 파싱 불필요)
+        for block in response.content:
+            if block.type == "tool_use":
+                return block.input
 
-        data = json.loads(response_text.strip())
+        raise Exception("대본 생성 실패 - 응답에 대본이 없습니다")
 
-        # Script 객체 생성
+    @staticmethod
+    def _build_script(data: dict) -> Script:
+        """대본 데이터(dict)로 Script 객체 생성"""
         scenes = [
             Scene(
                 scene_number=s["scene_number"],
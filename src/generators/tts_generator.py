@@ -1,7 +1,10 @@
 """TTS 생성기 - 텍스트를 음성으로 변환"""
 
+import asyncio
+import io
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Tuple
+from typing import BinaryIO, Optional, Tuple
 
 from gtts import gTTS
 from mutagen.mp3 import MP3
@@ -16,29 +19,51 @@ class TTSGenerator:
         self.language = language
         self.slow = slow
 
-    def generate(self, text: str, scene_number: int) -> Tuple[Path, float]:
+    def generate(
+        self, text: str, scene_number: int, sink: Optional[BinaryIO] = None
+    ) -> Tuple[Path, float]:
         """
         텍스트를 음성으로 변환
 
         Args:
             text: 나레이션 텍스트
             scene_number: 장면 번호
+            sink: 파일 대신 MP3를 기록할 버퍼 (선택, 이때 반환 경로에는 파일이 생기지 않음)
 
         Returns:
             (오디오 파일 경로, 길이(초))
         """
         output_path = TEMP_DIR / f"audio_{scene_number:03d}.mp3"
 
-        # TTS 생성
+        # TTS 생성 (메모리 버퍼에 받은 뒤 한 번에 저장)
         tts = gTTS(text=text, lang=self.language, slow=self.slow)
-        tts.save(str(output_path))
+        buffer = io.BytesIO()
+        tts.write_to_fp(buffer)
+        if sink is not None:
+            sink.write(buffer.getvalue())
+        else:
+            output_path.write_bytes(buffer.getvalue())
 
-        # 오디오 길이 계산
-        audio = MP3(str(output_path))
-        duration = audio.info.length
+        # 오디오 길이 계산 (파일을 다시 열지 않고 버퍼에서 읽음)
+        buffer.seek(0)
+        duration = MP3(buffer).info.length
 
         return output_path, duration
 
+    async def agenerate(
+        self, text: str, scene_number: int, executor: Optional[Executor] = None
+    ) -> Tuple[Path, float]:
+        """
+        generate의 비동기 버전 (gTTS 요청은 작업 스레드에서 실행)
+
+        Args:
+            text: 나레이션 텍스트
+            scene_number: 장면 번호
+            executor: 호출을 실행할 스레드 풀 (없으면 이벤트 루프 기본 풀)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.generate, text, scene_number)
+
 
 if __name__ == "__main__":
     # 테스트
@@ -1,24 +1,179 @@
 """비디오 합성기 - 이미지와 오디오를 결합하여 영상 생성"""
 
+import math
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import List, Tuple
 
-from PIL import Image, ImageDraw, ImageFont
-from moviepy.editor import (
-    ImageClip,
-    AudioFileClip,
-    concatenate_videoclips,
-    CompositeVideoClip,
-    TextClip,
-)
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 import numpy as np
 
-from ..config import OUTPUT_DIR, DEFAULT_VIDEO_WIDTH, DEFAULT_VIDEO_HEIGHT, DEFAULT_FPS
+from ..config import OUTPUT_DIR, TEMP_DIR, DEFAULT_VIDEO_WIDTH, DEFAULT_VIDEO_HEIGHT, DEFAULT_FPS
 from ..models import Script, Scene
 
 
+@lru_cache(maxsize=None)
+def _ffmpeg_exe() -> str:
+    """ffmpeg 실행 파일 경로 (imageio-ffmpeg 번들 또는 시스템 ffmpeg)"""
+    from imageio_ffmpeg import get_ffmpeg_exe
+
+    return get_ffmpeg_exe()
+
+
+def _run_ffmpeg(args: List[str]) -> None:
+    """ffmpeg 실행 (실패 시 오류 메시지와 함께 예외)"""
+    result = subprocess.run(
+        [_ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error", *args],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 실행 실패: {result.stderr.decode(errors='replace').strip()}")
+
+
+# 자막 배경 불투명도 (0-255)
+SUBTITLE_BG_ALPHA = 180
+
+# 하드웨어 인코더 우선순위 (auto 선택 시 앞에서부터 사용 가능한 것 선택)
+HW_ENCODERS = ["h264_nvenc", "h264_videotoolbox", "h264_qsv"]
+
+# 하드웨어 인코더 동시 세션 수 (소비자용 NVENC 드라이버 등은 동시 세션 수를 제한함)
+HW_ENCODE_SESSIONS = 2
+
+# 인코더별 품질/속도 옵션
+ENCODER_PARAMS = {
+    "libx264": ["-preset", "veryfast", "-crf", "20", "-tune", "stillimage"],
+    "h264_nvenc": ["-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "6M"],
+    "h264_videotoolbox": ["-b:v", "6M"],
+    "h264_qsv": ["-preset", "veryfast", "-b:v", "6M"],
+}
+
+
+@lru_cache(maxsize=None)
+def _available_encoders() -> frozenset:
+    """ffmpeg 빌드에 포함된 비디오 인코더 목록"""
+    result = subprocess.run(
+        [_ffmpeg_exe(), "-hide_banner", "-encoders"], capture_output=True, text=True
+    )
+    return frozenset(
+        parts[1] for parts in (line.split() for line in result.stdout.splitlines())
+        if len(parts) > 1 and parts[0].startswith("V")
+    )
+
+
+@lru_cache(maxsize=None)
+def _encoder_works(encoder: str) -> bool:
+    """
+    짧은 테스트 인코딩으로 인코더가 실제로 동작하는지 확인 (GPU/드라이버 없음 대비)
+
+    실제 장면 인코딩과 같은 픽셀 포맷/옵션으로 시험하여, 인코더는 있지만
+    옵션을 지원하지 않는 ffmpeg/드라이버도 걸러낸다.
+    """
+    if encoder not in _available_encoders():
+        return False
+    result = subprocess.run(
+        [_ffmpeg_exe(), "-hide_banner", "-loglevel", "error",
+         "-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1",
+         "-pix_fmt", "yuv420p", "-c:v", encoder, *ENCODER_PARAMS.get(encoder, []),
+         "-f", "null", "-"],
+        capture_output=True,
+    )
+    return result.returncode == 0
+
+
+def select_encoder(hwaccel: str = "auto") -> str:
+    """
+    H.264 인코더 선택
+
+    Args:
+        hwaccel: "auto"(사용 가능한 하드웨어 인코더, 없으면 libx264),
+                 "none"(항상 libx264), 또는 인코더 이름 직접 지정
+    """
+    if hwaccel == "none":
+        return "libx264"
+    candidates = HW_ENCODERS if hwaccel == "auto" else [hwaccel]
+    for encoder in candidates:
+        if encoder == "libx264" or _encoder_works(encoder):
+            return encoder
+    return "libx264"
+
+
+def _encode_workers(encoder: str, num_segments: int) -> Tuple[int, int]:
+    """
+    장면 조각 동시 인코딩 계획
+
+    Args:
+        encoder: 사용할 H.264 인코더
+        num_segments: 인코딩할 조각 수
+
+    Returns:
+        (동시 실행할 ffmpeg 프로세스 수, libx264 프로세스당 스레드 수 (0이면 지정 안 함))
+    """
+    if encoder != "libx264":
+        # 하드웨어 인코더는 세션 수 제한이 있으므로 소수만 동시에 실행
+        return min(HW_ENCODE_SESSIONS, num_segments), 0
+    # 프로세스 수 x 스레드 수가 코어 수를 넘지 않도록 나눔 (프로세스당 최소 2스레드)
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(num_segments, cpus // 2))
+    return workers, max(1, cpus // workers)
+
+
+# 자막 줄바꿈 구분자 (공백/문장부호)
+_WRAP_SEPARATORS = " .,!?。，！？"
+
+
+@lru_cache(maxsize=None)
+def _wrap_pattern(max_chars: int) -> "re.Pattern":
+    """
+    한 줄 단위로 매치하는 정규식
+
+    남은 텍스트가 한 줄에 들어가면 그대로, 아니면 max_chars자 이내에서 마지막 구분자까지,
+    구분자가 없으면 max_chars자에서 강제로 끊는다.
+    """
+    sep = re.escape(_WRAP_SEPARATORS)
+    return re.compile(
+        rf".{{1,{max_chars}}}\Z|.{{0,{max_chars - 1}}}[{sep}]|.{{{max_chars}}}", re.DOTALL
+    )
+
+
+def _wrap_subtitle(text: str, max_chars_per_line: int = 40, max_lines: int = 2) -> List[str]:
+    """자막 텍스트를 구분자 단위로 끊어 한 줄 max_chars_per_line자 이내로 배치 (최대 max_lines줄)"""
+    # 공백뿐인 매치(강제 줄바꿈/연속 공백 직후)는 줄 수에 세지 않도록 먼저 걸러냄
+    matches = _wrap_pattern(max_chars_per_line).finditer(text)
+    lines = list(islice(filter(None, (m.group(0).strip() for m in matches)), max_lines + 1))
+
+    # 최대 줄 수 제한
+    if len(lines) > max_lines:
+        lines = lines[:max_lines - 1] + [lines[max_lines - 1] + "..."]
+    return lines
+
+
+@lru_cache(maxsize=1024)
+def _text_width(font: ImageFont.ImageFont, line: str) -> int:
+    """자막 한 줄의 픽셀 너비 (폰트는 고정이므로 같은 줄은 한 번만 측정)"""
+    bbox = font.getbbox(line)
+    return bbox[2] - bbox[0]
+
+
+def _write_concat_list(paths: List[Path], list_path: Path) -> Path:
+    """ffmpeg concat demuxer용 파일 목록 작성"""
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = Path(path).resolve().as_posix().replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    return list_path
+
+
 class VideoComposer:
     """이미지와 오디오를 결합하여 최종 영상 생성"""
 
+    # 자막 폰트 (처음 사용할 때 한 번만 로드)
+    _FONT = None
+
     def __init__(
         self,
         width: int = DEFAULT_VIDEO_WIDTH,
@@ -27,125 +182,207 @@ class VideoComposer:
         enable_subtitles: bool = True,
         enable_transitions: bool = True,
         transition_duration: float = 0.5,
+        hwaccel: str = "auto",
     ):
+        """
+        Args:
+            hwaccel: 영상 인코더 선택 ("auto", "none", 또는 "h264_nvenc" 등 인코더 이름)
+        """
         self.width = width
         self.height = height
         self.fps = fps
         self.enable_subtitles = enable_subtitles
         self.enable_transitions = enable_transitions
         self.transition_duration = transition_duration
+        self.hwaccel = hwaccel
 
-    def _add_subtitle_to_image(self, img_array: np.ndarray, text: str) -> np.ndarray:
-        """이미지에 자막 추가 (Pillow 사용)"""
-        img = Image.fromarray(img_array)
-        draw = ImageDraw.Draw(img)
-
-        # 텍스트를 여러 줄로 나누기 (한 줄에 약 40자)
-        max_chars_per_line = 40
-        lines = []
-        current_line = ""
-        for char in text:
-            current_line += char
-            if len(current_line) >= max_chars_per_line and char in " .,!?。，！？":
-                lines.append(current_line.strip())
-                current_line = ""
-        if current_line:
-            lines.append(current_line.strip())
-
-        # 최대 2줄로 제한
-        if len(lines) > 2:
-            lines = [lines[0], lines[1] + "..."]
-
-        # 폰트 설정 (시스템 기본 폰트 사용)
-        try:
-            font = ImageFont.truetype("malgun.ttf", 36)  # Windows 맑은고딕
-        except:
+        # 자막 배치 (해상도에 따라 고정)
+        self.subtitle_line_height = 45
+        self.subtitle_padding = 20
+        self.subtitle_bg_bottom = self.height - 40
+
+    @classmethod
+    def _get_font(cls) -> ImageFont.ImageFont:
+        """자막 폰트 (시스템 기본 폰트 사용, 한 번만 로드하여 캐시)"""
+        if cls._FONT is None:
             try:
-                font = ImageFont.truetype("NanumGothic.ttf", 36)  # 나눔고딕
-            except:
-                font = ImageFont.load_default()
+                font = ImageFont.truetype("malgun.ttf", 36)  # Windows 맑은고딕
+            except OSError:
+                try:
+                    font = ImageFont.truetype("NanumGothic.ttf", 36)  # 나눔고딕
+                except OSError:
+                    font = ImageFont.load_default()
+            cls._FONT = font
+        return cls._FONT
+
+    def _add_subtitle_to_image(self, img_array: np.ndarray, text: str) -> np.ndarray:
+        """이미지에 자막 추가 (배경은 NumPy, 텍스트는 Pillow로 그림)"""
+        # 프레임은 항상 (H, W, 3) uint8 RGB (알파 채널 없음)
+        assert img_array.ndim == 3 and img_array.shape[2] == 3 and img_array.dtype == np.uint8
+        lines = _wrap_subtitle(text)
+
+        font = self._get_font()
 
         # 자막 영역 계산
-        line_height = 45
+        line_height = self.subtitle_line_height
         total_height = len(lines) * line_height
         y_start = self.height - total_height - 60  # 하단에서 60픽셀 위
 
-        # 반투명 배경 그리기
-        padding = 20
-        bg_top = y_start - padding
-        bg_bottom = self.height - 40
-        draw.rectangle(
-            [(0, bg_top), (self.width, bg_bottom)],
-            fill=(0, 0, 0, 180)
-        )
+        # 반투명 배경 그리기 (검정 알파 180/255 = 원본 밝기 75/255로 혼합)
+        bg_top = max(0, y_start - self.subtitle_padding)
+        band = img_array[bg_top:self.subtitle_bg_bottom]
+        band[:] = (band.astype(np.uint16) * (255 - SUBTITLE_BG_ALPHA) // 255).astype(np.uint8)
+
+        # 텍스트는 자막 영역만 RGB 이미지로 감싸서 직접 그림 (알파 레이어 없음)
+        band_img = Image.fromarray(band)
+        draw = ImageDraw.Draw(band_img)
 
         # 텍스트 그리기 (그림자 효과)
         for i, line in enumerate(lines):
             # 텍스트 너비 계산
-            bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = bbox[2] - bbox[0]
-            x = (self.width - text_width) // 2
-            y = y_start + i * line_height
+            x = (self.width - _text_width(font, line)) // 2
+            y = y_start + i * line_height - bg_top
 
             # 그림자
             draw.text((x + 2, y + 2), line, font=font, fill=(0, 0, 0))
             # 본문
             draw.text((x, y), line, font=font, fill=(255, 255, 255))
 
-        return np.array(img)
+        band[:] = np.asarray(band_img)
 
-    def _create_fade_effect(self, clip: ImageClip, fade_in: bool = True, fade_out: bool = True) -> ImageClip:
-        """페이드 인/아웃 효과 적용"""
-        if fade_in and self.transition_duration > 0:
-            clip = clip.fadein(self.transition_duration)
-        if fade_out and self.transition_duration > 0:
-            clip = clip.fadeout(self.transition_duration)
-        return clip
+        return img_array
 
-    def compose_scene(self, scene: Scene, is_first: bool = False, is_last: bool = False) -> ImageClip:
+    def compose_scene(self, scene: Scene) -> np.ndarray:
         """
-        단일 장면을 비디오 클립으로 변환
+        단일 장면의 최종 프레임(자막 포함) 생성
 
         Args:
             scene: Scene 객체 (image_path, audio_path, duration 필요)
-            is_first: 첫 번째 장면 여부 (페이드인만 적용)
-            is_last: 마지막 장면 여부 (페이드아웃만 적용)
 
         Returns:
-            ImageClip 객체
+            (height, width, 3) uint8 RGB 프레임
         """
         if not scene.image_path or not scene.audio_path:
             raise ValueError(f"장면 {scene.scene_number}에 이미지 또는 오디오가 없습니다")
 
-        # 이미지 로드 및 리사이즈 (Pillow 사용 - moviepy resize 호환성 문제 회피)
+        # 이미지 로드 및 리사이즈 (RGB로 통일, 비율 유지 후 남는 영역은 검정 레터박스)
         img = Image.open(str(scene.image_path))
-        img = img.resize((self.width, self.height), Image.LANCZOS)
+        if img.format == "JPEG":
+            # libjpeg의 축소 디코딩 사용 (목표 크기의 2배 이상은 유지하여 LANCZOS 품질 보존)
+            img.draft("RGB", (self.width * 2, self.height * 2))
+        img = ImageOps.pad(img.convert("RGB"), (self.width, self.height), Image.LANCZOS, color=(0, 0, 0))
         img_array = np.array(img)
 
         # 자막 추가
         if self.enable_subtitles and scene.narration:
             img_array = self._add_subtitle_to_image(img_array, scene.narration)
 
-        # 이미지 클립 생성
-        image_clip = ImageClip(img_array)
-        image_clip = image_clip.set_duration(scene.duration)
+        return img_array
 
-        # 페이드 효과 적용
-        if self.enable_transitions:
-            fade_in = is_first  # 첫 장면만 페이드인
-            fade_out = is_last  # 마지막 장면만 페이드아웃
-            image_clip = self._create_fade_effect(image_clip, fade_in=fade_in, fade_out=fade_out)
+    def _segment_filter(
+        self, num_frames: int, is_first: bool, is_last: bool, scale: bool = False
+    ) -> str:
+        """
+        정지 화면 조각용 필터
 
-        # 오디오 추가
-        audio_clip = AudioFileClip(str(scene.audio_path))
-        image_clip = image_clip.set_audio(audio_clip)
+        프레임을 한 번만 디코딩/yuv420p 변환한 뒤 loop 필터로 복제하고,
+        첫 장면은 페이드인, 마지막 장면은 페이드아웃을 적용한다.
+        scale이면 원본 이미지를 ffmpeg에서 비율을 유지한 채 출력 해상도에 맞추고 레터박스를 채운다.
+        """
+        filters = ["format=yuv420p", f"loop=loop={num_frames - 1}:size=1:start=0"]
+        if scale:
+            filters[:0] = [
+                f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease:flags=lanczos",
+                f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2",
+            ]
+        duration = num_frames / self.fps
+        # 장면이 짧아도 페이드인/아웃이 겹치지 않도록 길이의 절반으로 제한
+        d = min(self.transition_duration, duration / 2)
+        if self.enable_transitions and d > 0:
+            if is_first:
+                filters.append(f"fade=t=in:st=0:d={d:.3f}")
+            if is_last:
+                filters.append(f"fade=t=out:st={duration - d:.3f}:d={d:.3f}")
+        return ",".join(filters)
+
+    def render_segment(
+        self,
+        scene: Scene,
+        encoder: str,
+        num_frames: int,
+        is_first: bool = False,
+        is_last: bool = False,
+        threads: int = 0,
+    ) -> Path:
+        """
+        단일 장면을 영상 조각(mp4, 오디오 없음)으로 인코딩
+
+        자막을 입힌 프레임을 PNG로 한 번만 저장하고 (자막이 없으면 원본 이미지를 그대로)
+        ffmpeg 안에서 장면 길이만큼 반복하므로, 인코더는 정지 화면에 대해 사실상 skip 프레임만 만들어낸다.
+        (-loop 1 입력은 매 프레임 PNG를 다시 디코딩하므로 loop 필터를 사용)
+
+        Args:
+            scene: Scene 객체 (image_path, audio_path, duration 필요)
+            encoder: 사용할 H.264 인코더
+            num_frames: 조각의 프레임 수
+            is_first: 첫 번째 장면 여부 (페이드인 적용)
+            is_last: 마지막 장면 여부 (페이드아웃 적용)
+            threads: 인코더 스레드 수 (0이면 ffmpeg 기본값)
+
+        Returns:
+            장면 영상 조각 경로
+        """
+        segment_path = TEMP_DIR / f"segment_{scene.scene_number:03d}.mp4"
 
-        return image_clip
+        if self.enable_subtitles and scene.narration:
+            frame_path = TEMP_DIR / f"frame_{scene.scene_number:03d}.png"
+            # 한 번 읽고 지우는 임시 파일이므로 압축보다 저장 속도 우선
+            Image.fromarray(self.compose_scene(scene)).save(frame_path, compress_level=1)
+            scale = False
+        else:
+            # 자막이 없으면 Pillow를 거치지 않고 원본 이미지를 ffmpeg에서 바로 리사이즈
+            frame_path = scene.image_path
+            scale = True
+
+        _run_ffmpeg([
+            "-framerate", str(self.fps), "-i", str(frame_path),
+            "-vf", self._segment_filter(num_frames, is_first, is_last, scale=scale),
+            "-frames:v", str(num_frames),
+            "-c:v", encoder, *ENCODER_PARAMS.get(encoder, []),
+            *self._gop_params(encoder, num_frames),
+            *(["-threads", str(threads)] if threads else []),
+            "-an",
+            str(segment_path),
+        ])
+        return segment_path
+
+    @staticmethod
+    def _gop_params(encoder: str, num_frames: int) -> List[str]:
+        """
+        장면 조각 하나를 GOP 하나로 인코딩하는 옵션
+
+        조각은 정지 화면이므로 첫 프레임만 키프레임으로 두고 나머지는 모두 P/skip 프레임으로 만든다.
+        (조각마다 키프레임으로 시작하므로 concat 후에도 장면 단위 탐색은 유지됨)
+        """
+        if encoder == "libx264":
+            return ["-x264-params", f"keyint={num_frames}:min-keyint={num_frames}:scenecut=0"]
+        return ["-g", str(num_frames)]
+
+    def _concat_audio(self, script: Script) -> Path:
+        """장면 오디오를 재인코딩 없이 하나로 연결"""
+        audio_paths = script.audio_paths
+        list_path = _write_concat_list(audio_paths, TEMP_DIR / "audio_list.txt")
+        audio_path = TEMP_DIR / f"audio_concat{audio_paths[0].suffix}"
+        _run_ffmpeg(["-f", "concat", "-safe", "0", "-i", str(list_path), "-c", "copy", str(audio_path)])
+        return audio_path
 
     def compose(self, script: Script, output_filename: str = None) -> Path:
         """
         전체 대본을 영상으로 합성
 
+        장면마다 정지 화면 영상 조각을 만든 뒤, 조각과 장면 오디오를 각각
+        ffmpeg concat demuxer로 재인코딩 없이 이어 붙여 하나의 mp4로 담는다.
+
         Args:
             script: 완성된 Script 객체
             output_filename: 출력 파일명 (없으면 제목 사용)
@@ -153,17 +390,39 @@ class VideoComposer:
         Returns:
             생성된 영상 파일 경로
         """
-        # 각 장면을 클립으로 변환
-        clips = []
+        if not script.scenes:
+            raise ValueError("합성할 장면이 없습니다")
+
+        # 프레임 수 계산과 인코딩 전에 모든 장면의 이미지/오디오/길이 확인
+        for scene in script.scenes:
+            if (
+                not scene.image_path
+                or not scene.audio_path
+                or scene.duration is None
+                or not math.isfinite(scene.duration)
+            ):
+                raise ValueError(f"장면 {scene.scene_number}에 이미지 또는 오디오가 없습니다")
+
+        # 인코더 선택 (첫 호출 시 한 번만 탐지하여 캐시)
+        encoder = select_encoder(self.hwaccel)
+
+        # 장면별 프레임 수
+        # (장면 경계를 누적 시간으로 반올림하여 오디오와 프레임 수 오차가 쌓이지 않도록 함)
+        end_frames = np.rint(np.cumsum(script.durations) * self.fps).astype(int)
+        frame_counts = np.maximum(np.diff(end_frames, prepend=0), 1).tolist()
+
+        # 각 장면을 영상 조각으로 동시에 인코딩
+        # (Pillow 리사이즈와 ffmpeg 하위 프로세스는 GIL 밖에서 실행되므로 스레드로 충분)
         total_scenes = len(script.scenes)
-        for i, scene in enumerate(script.scenes):
-            is_first = (i == 0)
-            is_last = (i == total_scenes - 1)
-            clip = self.compose_scene(scene, is_first=is_first, is_last=is_last)
-            clips.append(clip)
-
-        # 클립들을 연결
-        final_clip = concatenate_videoclips(clips, method="compose")
+        workers, threads = _encode_workers(encoder, total_scenes)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            segments = list(executor.map(
+                lambda i: self.render_segment(
+                    script.scenes[i], encoder, frame_counts[i],
+                    is_first=(i == 0), is_last=(i == total_scenes - 1), threads=threads,
+                ),
+                range(total_scenes),
+            ))
 
         # 출력 파일명 설정
         if output_filename is None:
@@ -174,23 +433,22 @@ class VideoComposer:
 
         output_path = OUTPUT_DIR / output_filename
 
-        # 영상 렌더링
-        final_clip.write_videofile(
+        # 영상 조각과 오디오를 각각 연결하여 합치기 (모두 스트림 복사)
+        audio_path = self._concat_audio(script)
+        list_path = _write_concat_list(segments, TEMP_DIR / "segments.txt")
+        _run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", str(list_path),
+            "-i", str(audio_path),
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c", "copy", "-movflags", "+faststart",
             str(output_path),
-            fps=self.fps,
-            codec="libx264",
-            audio_codec="aac",
-            temp_audiofile=str(OUTPUT_DIR / "temp_audio.m4a"),
-            remove_temp=True,
-        )
-
-        # 리소스 정리
-        final_clip.close()
-        for clip in clips:
-            clip.close()
+        ])
 
         return output_path
 
 
 if __name__ == "__main__":
+    # 테스트 (자막 줄바꿈: 넘친 텍스트는 버리지 않고 "..."로 표시)
+    assert _wrap_subtitle("x" * 40 + " " + "y" * 40 + " z") == ["x" * 40, "y" * 40 + "..."]
+    assert _wrap_subtitle("x" * 39 + "  " + "y" * 39 + "  zzzzz") == ["x" * 39, "y" * 39 + "..."]
     print("VideoComposer 모듈 - 직접 실행하려면 main.py를 사용하세요")
@@ -4,6 +4,8 @@ from dataclasses import dataclass, field
 from typing import List, Optional
 from pathlib import Path
 
+import numpy as np
+
 
 @dataclass
 class Scene:
@@ -26,10 +28,34 @@ class Script:
     def total_scenes(self) -> int:
         return len(self.scenes)
 
+    # 장면 속성별 병렬 배열 (일괄 처리용 뷰, 원본은 scenes)
+    @property
+    def durations(self) -> np.ndarray:
+        """장면별 길이 배열 (초, 미정이면 NaN)"""
+        return np.array(
+            [np.nan if s.duration is None else s.duration for s in self.scenes], dtype=float
+        )
+
+    @property
+    def narrations(self) -> List[str]:
+        return [s.narration for s in self.scenes]
+
+    @property
+    def image_prompts(self) -> List[str]:
+        return [s.image_prompt for s in self.scenes]
+
+    @property
+    def image_paths(self) -> List[Optional[Path]]:
+        return [s.image_path for s in self.scenes]
+
+    @property
+    def audio_paths(self) -> List[Optional[Path]]:
+        return [s.audio_path for s in self.scenes]
+
     @property
     def total_duration(self) -> float:
         """총 영상 길이 (초)"""
-        return sum(s.duration or 0 for s in self.scenes)
+        return float(np.nansum(self.durations))
 
 
 @dataclass
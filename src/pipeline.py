@@ -1,11 +1,13 @@
 """메인 파이프라인 - 모든 생성기를 연결하여 영상 제작"""
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from .models import VideoProject, Script
 from .generators import ScriptGenerator, ImageGenerator, TTSGenerator, VideoComposer
-from .config import RESOLUTION_PRESETS
+from .config import RESOLUTION_PRESETS, MAX_WORKERS
 
 
 def log(msg: str):
@@ -24,6 +26,7 @@ class DDalkkakPipeline:
         enable_subtitles: bool = True,
         enable_transitions: bool = True,
         resolution: str = "1080p",
+        hwaccel: str = "auto",
     ):
         """
         Args:
@@ -33,6 +36,7 @@ class DDalkkakPipeline:
             enable_subtitles: 자막 표시 여부
             enable_transitions: 장면 전환 효과 여부
             resolution: 해상도 ("720p", "1080p", "1440p", "4k")
+            hwaccel: 영상 인코더 ("auto"면 사용 가능한 하드웨어 인코더, "none"이면 libx264)
         """
         # 해상도 설정
         width, height = RESOLUTION_PRESETS.get(resolution, RESOLUTION_PRESETS["1080p"])
@@ -45,14 +49,101 @@ class DDalkkakPipeline:
             height=height,
             enable_subtitles=enable_subtitles,
             enable_transitions=enable_transitions,
+            hwaccel=hwaccel,
         )
         self.target_duration = target_duration
         self.test_mode = test_mode
         self.resolution = resolution
 
+    def generate_media(
+        self,
+        script: Script,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """
+        모든 장면의 이미지와 음성을 동시에 생성 (agenerate_media의 동기 래퍼)
+
+        Args:
+            script: 대본 (각 장면의 image_path, audio_path, duration이 채워짐)
+            on_progress: 작업 하나가 끝날 때마다 (완료 수, 전체 수)로 호출
+        """
+        asyncio.run(self.agenerate_media(script, on_progress))
+
+    async def agenerate_media(
+        self,
+        script: Script,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """
+        모든 장면의 이미지와 음성을 비동기로 동시에 생성
+
+        이미지와 TTS는 서로 의존하지 않으므로 한 이벤트 루프에서 함께 진행하고,
+        단계별 동시 실행 수는 MAX_WORKERS로 제한한다. 하나라도 실패하면
+        아직 시작하지 않은 작업은 취소된다. 블로킹 호출은 이 함수 전용 스레드 풀
+        (두 단계 합계 2 * MAX_WORKERS개)에서 실행하여, CPU 수에 비례하는 이벤트 루프
+        기본 풀 크기에 동시 실행 수가 묶이지 않도록 한다.
+
+        Args:
+            script: 대본 (각 장면의 image_path, audio_path, duration이 채워짐)
+            on_progress: 작업 하나가 끝날 때마다 (완료 수, 전체 수)로 호출
+        """
+        scenes = script.scenes
+        total = len(scenes) * 2
+        done = 0
+        image_slots = asyncio.Semaphore(MAX_WORKERS)
+        tts_slots = asyncio.Semaphore(MAX_WORKERS)
+
+        def finished():
+            # 이벤트 루프 스레드(= 호출한 스레드)에서 실행됨
+            nonlocal done
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+        async def make_image(scene):
+            async with image_slots:
+                scene.image_path = await self.image_gen.agenerate(
+                    scene.image_prompt, scene.scene_number, executor
+                )
+            log(f"  -> 장면 {scene.scene_number} 이미지 완료")
+            finished()
+
+        async def make_audio(scene):
+            async with tts_slots:
+                scene.audio_path, scene.duration = await self.tts_gen.agenerate(
+                    scene.narration, scene.scene_number, executor
+                )
+            log(f"  -> 장면 {scene.scene_number} 음성 완료 ({scene.duration:.1f}초)")
+            finished()
+
+        with ThreadPoolExecutor(max_workers=2 * MAX_WORKERS) as executor:
+            tasks = [asyncio.ensure_future(make_image(s)) for s in scenes]
+            tasks += [asyncio.ensure_future(make_audio(s)) for s in scenes]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+
     def create(self, prompt: str, output_filename: Optional[str] = None) -> Path:
         """
-        프롬프트 하나로 영상 생성
+        프롬프트 하나로 영상 생성 (acreate의 동기 래퍼)
+
+        Args:
+            prompt: 영상 주제/요청
+            output_filename: 출력 파일명 (선택)
+
+        Returns:
+            생성된 영상 파일 경로
+        """
+        return asyncio.run(self.acreate(prompt, output_filename))
+
+    async def acreate(self, prompt: str, output_filename: Optional[str] = None) -> Path:
+        """
+        프롬프트 하나로 영상 생성 (비동기)
+
+        대본 생성과 영상 합성은 작업 스레드에서 실행하여 이벤트 루프를 막지 않는다.
 
         Args:
             prompt: 영상 주제/요청
@@ -64,34 +155,24 @@ class DDalkkakPipeline:
         project = VideoProject(prompt=prompt)
 
         # 1. 대본 생성
-        log("[1/4] 대본 생성 중...")
+        log("[1/3] 대본 생성 중...")
         project.status = "scripting"
-        project.script = self.script_gen.generate(prompt, self.target_duration)
+        project.script = await asyncio.to_thread(
+            self.script_gen.generate, prompt, self.target_duration
+        )
         log(f"  -> 대본 완성: {project.script.total_scenes}개 장면")
         log(f"  -> 제목: {project.script.title}")
 
-        # 2. 이미지 생성
-        log("[2/4] 이미지 생성 중...")
+        # 2. 이미지 + TTS 생성 (동시 진행)
+        log("[2/3] 이미지 및 음성 생성 중...")
         project.status = "generating"
-        for scene in project.script.scenes:
-            scene.image_path = self.image_gen.generate(
-                scene.image_prompt, scene.scene_number
-            )
-            log(f"  -> 장면 {scene.scene_number} 이미지 완료")
-
-        # 3. TTS 생성
-        log("[3/4] 음성 생성 중...")
-        for scene in project.script.scenes:
-            scene.audio_path, scene.duration = self.tts_gen.generate(
-                scene.narration, scene.scene_number
-            )
-            log(f"  -> 장면 {scene.scene_number} 음성 완료 ({scene.duration:.1f}초)")
+        await self.agenerate_media(project.script)
 
-        # 4. 비디오 합성
-        log("[4/4] 영상 합성 중...")
+        # 3. 비디오 합성
+        log("[3/3] 영상 합성 중...")
         project.status = "composing"
-        project.output_path = self.video_composer.compose(
-            project.script, output_filename
+        project.output_path = await asyncio.to_thread(
+            self.video_composer.compose, project.script, output_filename
         )
         log("  -> 영상 합성 완료")
 